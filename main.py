@@ -2,11 +2,14 @@ import os
 import logging
 import random
 import json
+from string import Template
 from typing import List, Optional
 from datetime import datetime
+from http.cookiejar import DefaultCookiePolicy
 
 # Third-party libraries
 import requests  # Used for calling People Data Labs / Job Boards
+from requests.adapters import HTTPAdapter
 from fastapi import FastAPI, HTTPException
 from pydantic import BaseModel
 
@@ -28,6 +31,31 @@ app = FastAPI(
 PDL_API_KEY = os.getenv("PDL_API_KEY")  # For Candidate Search
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")  # For AI Intelligence
 
+# Reuse one pooled HTTP session so repeat PDL calls skip the TCP/TLS handshake.
+# Sync endpoints run on FastAPI's threadpool (40 threads by default), so size the
+# connection pool to match, and refuse cookies so no state leaks between requests.
+PDL_TIMEOUT_SECONDS = 15
+HTTP_POOL_SIZE = 40
+http_session = requests.Session()
+http_session.mount("https://", HTTPAdapter(pool_maxsize=HTTP_POOL_SIZE))
+http_session.cookies.set_policy(DefaultCookiePolicy(allowed_domains=[]))
+
+# Keyword list for mock skill parsing, paired with its lowercased form once at
+# import so each request only lowercases the JD a single time
+COMMON_SKILLS = ["Java", "Python", "AWS", "React", "Spring", "Docker", "Kubernetes"]
+_SKILL_KEYS = [(skill, skill.lower()) for skill in COMMON_SKILLS]
+
+# Bench pitch email, kept out of the handler so it can be edited or swapped
+# without touching request logic
+PITCH_TEMPLATE = Template(
+    "Subject: Immediate Available Consultant - $name\n\n"
+    "Hi Hiring Manager,\n\n"
+    "I have a senior consultant, $name, who matches your requirements perfectly. "
+    "Expertise: $tech_stack.\n"
+    "Visa: Ready to deploy.\n\n"
+    "Please let me know if you are open to C2C."
+)
+
 # --- 2. DATA MODELS (INPUT/OUTPUT SCHEMA) ---
 
 class JobRequest(BaseModel):
@@ -43,6 +71,40 @@ class BenchRequest(BaseModel):
     resume_text: str
     tech_stack: str
 
+# Response envelopes: declaring these lets FastAPI serialize straight to JSON
+# bytes via pydantic-core instead of walking plain dicts with jsonable_encoder.
+# PDL fields can come back null, so anything sourced from it is Optional.
+
+class Candidate(BaseModel):
+    """A sourced candidate after visa verification"""
+    name: Optional[str] = None
+    job_title: Optional[str] = None
+    skills: List[str] = []
+    education: List[dict] = []
+    email: Optional[str] = None
+    location: Optional[str] = None
+    verified_visa_status: str
+    match_score: str
+    action_item: str
+
+class SourcingResponse(BaseModel):
+    """Result of the candidate sourcing workflow"""
+    job_title: str
+    total_scanned: int
+    verified_count: int
+    candidates: List[Candidate]
+
+class MarketJob(BaseModel):
+    """An open role matched to a bench consultant"""
+    title: str
+    company: str
+
+class BenchResponse(BaseModel):
+    """Result of the bench marketing workflow"""
+    consultant: str
+    market_opportunities: List[MarketJob]
+    auto_generated_email: str
+
 # --- 3. CORE LOGIC CLASSES ---
 
 class SourcingEngine:
@@ -70,7 +132,9 @@ class SourcingEngine:
             
             headers = {'X-Api-Key': PDL_API_KEY}
             try:
-                response = requests.get(url, headers=headers, params={'sql': sql_query})
+                response = http_session.get(
+                    url, headers=headers, params={'sql': sql_query}, timeout=PDL_TIMEOUT_SECONDS
+                )
                 if response.status_code == 200:
                     data = response.json()
                     return SourcingEngine._normalize_pdl_data(data['data'])
@@ -121,10 +185,11 @@ class IntelligenceEngine:
     """
     
     @staticmethod
-    def infer_visa_status(education_history: List[dict]) -> str:
+    def infer_visa_status(education_history: List[dict], current_year: Optional[int] = None) -> str:
         """
         THE SECRET SAUCE:
         Infers visa status based on where/when they went to school.
+        Pass current_year when scoring a batch to avoid a clock read per candidate.
         """
         status = "Unknown"
         us_grad_year = 0
@@ -140,7 +205,8 @@ class IntelligenceEngine:
                 if len(date_str) >= 4:
                     us_grad_year = int(date_str[:4])
 
-        current_year = datetime.now().year
+        if current_year is None:
+            current_year = datetime.now().year
 
         # 2. Apply Heuristic Logic
         if not has_us_degree:
@@ -166,8 +232,8 @@ class IntelligenceEngine:
         In Production: Use OpenAI API.
         In Mock: Use simple keyword matching.
         """
-        common_skills = ["Java", "Python", "AWS", "React", "Spring", "Docker", "Kubernetes"]
-        found_skills = [skill for skill in common_skills if skill.lower() in text.lower()]
+        lowered = text.lower()
+        found_skills = [skill for skill, key in _SKILL_KEYS if key in lowered]
         return found_skills if found_skills else ["General IT"]
 
 # --- 4. API ENDPOINTS (THE CONTROLLERS) ---
@@ -177,7 +243,7 @@ def health_check():
     """Simple check to ensure server is running"""
     return {"status": "Online", "mode": "Real" if PDL_API_KEY else "Mock"}
 
-@app.post("/automations/source-candidates")
+@app.post("/automations/source-candidates", response_model=SourcingResponse)
 def source_candidates(request: JobRequest):
     """
     WORKFLOW A: FIND CANDIDATES
@@ -195,10 +261,11 @@ def source_candidates(request: JobRequest):
     raw_candidates = SourcingEngine.find_candidates(target_skills)
     
     verified_candidates = []
+    current_year = datetime.now().year
     
     # Step 3: Verify & Filter
     for cand in raw_candidates:
-        inferred_visa = IntelligenceEngine.infer_visa_status(cand['education'])
+        inferred_visa = IntelligenceEngine.infer_visa_status(cand['education'], current_year)
         
         # Rejection Logic
         if request.visa_requirement == "Citizen/GC" and inferred_visa != "Citizen/GC":
@@ -218,7 +285,7 @@ def source_candidates(request: JobRequest):
         "candidates": verified_candidates
     }
 
-@app.post("/automations/market-bench")
+@app.post("/automations/market-bench", response_model=BenchResponse)
 def market_bench(request: BenchRequest):
     """
     WORKFLOW B: BENCH MARKETING
@@ -235,14 +302,7 @@ def market_bench(request: BenchRequest):
     ]
     
     # Generate Email
-    email_body = (
-        f"Subject: Immediate Available Consultant - {request.name}\n\n"
-        f"Hi Hiring Manager,\n\n"
-        f"I have a senior consultant, {request.name}, who matches your requirements perfectly. "
-        f"Expertise: {request.tech_stack}.\n"
-        f"Visa: Ready to deploy.\n\n"
-        f"Please let me know if you are open to C2C."
-    )
+    email_body = PITCH_TEMPLATE.substitute(name=request.name, tech_stack=request.tech_stack)
     
     return {
         "consultant": request.name,
@@ -253,5 +313,13 @@ def market_bench(request: BenchRequest):
 # --- 5. SERVER STARTUP ---
 if __name__ == "__main__":
     import uvicorn
-    # Listen on all interfaces (0.0.0.0) so Cloud/Docker can reach it
-    uvicorn.run(app, host="0.0.0.0", port=10000)
+    # Listen on all interfaces (0.0.0.0) so Cloud/Docker can reach it.
+    # Workers need the app as an import string; set WEB_CONCURRENCY to run more than one.
+    # Loop/HTTP stay on "auto", which picks uvloop + httptools when installed.
+    uvicorn.run(
+        "main:app",
+        host="0.0.0.0",
+        port=10000,
+        workers=int(os.getenv("WEB_CONCURRENCY", "1")),
+        log_level="info"
+    )